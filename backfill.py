@@ -0,0 +1,113 @@
+"""
+backfill.py
+Rekonstruksi percobaan login gagal dari log lama (mis. /var/log/auth.log.1) saat monitor.py start.
+Dipakai lewat: python monitor.py --backfill FILE
+"""
+
+import socket
+import struct
+import time
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+
+from patterns import FAILED, compile_ascii
+
+try:
+    from numba import njit
+except ImportError:  # tanpa numba kernel tetap jalan sebagai Python biasa
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+# Grup 1: timestamp ISO (rsyslog modern) atau gaya BSD "Nov 11 11:02:45"; grup 2: user; grup 3: IP
+FAILED_RE = compile_ascii(
+    (rf'^(\d{{4}}-\d\d-\d\dT\S+|[A-Z][a-z]{{2}} [ \d]\d \d\d:\d\d:\d\d) .*?{FAILED}').encode()
+)
+
+
+@lru_cache(maxsize=4096)
+def parse_timestamp(stamp: bytes) -> int:
+    """Ubah timestamp syslog menjadi unix time (detik)."""
+    text = stamp.decode("ascii")
+    if text[0].isdigit():
+        return int(datetime.fromisoformat(text).timestamp())
+    # Format BSD tidak menyimpan tahun: anggap tahun ini, kecuali hasilnya jatuh di masa depan
+    now = time.time()
+    year = time.localtime(now).tm_year
+    ts = time.mktime(time.strptime(f"{year} {text}", "%Y %b %d %H:%M:%S"))
+    if ts > now + 86400:
+        ts = time.mktime(time.strptime(f"{year - 1} {text}", "%Y %b %d %H:%M:%S"))
+    return int(ts)
+
+
+def load_failures(path):
+    """Baca file log sekali jalan; kembalikan array (ip_u32, ts_unix) untuk setiap login gagal."""
+    ips, stamps = [], []
+    with open(path, "rb") as f:
+        for line in f:
+            if b"Failed password" not in line:
+                continue
+            m = FAILED_RE.search(line)
+            if not m:
+                continue
+            try:
+                ip = struct.unpack("!I", socket.inet_aton(m.group(3).decode("ascii")))[0]
+                ts = parse_timestamp(m.group(1))
+            except (OSError, ValueError):
+                continue
+            ips.append(ip)
+            stamps.append(ts)
+    return np.array(ips, dtype=np.int64), np.array(stamps, dtype=np.int64)
+
+
+@njit(cache=True)
+def windowed_counts(ips, ts, window_s):
+    """Jumlah gagal per IP dalam window_s detik terakhir untuk tiap kejadian.
+
+    Input harus sudah urut per IP lalu per waktu.
+    """
+    n = ips.shape[0]
+    counts = np.empty(n, dtype=np.int64)
+    left = 0
+    for i in range(n):
+        if i > 0 and ips[i] != ips[i - 1]:
+            left = i
+        while ts[left] < ts[i] - window_s:
+            left += 1
+        counts[i] = i - left + 1
+    return counts
+
+
+def ip_to_str(ip: int) -> str:
+    """Kembalikan IPv4 uint32 ke bentuk titik."""
+    return socket.inet_ntoa(struct.pack("!I", int(ip)))
+
+
+def backfill(path, window_s: int, threshold: int, now=None):
+    """Laporkan IP yang melewati threshold di log lama.
+
+    Mengembalikan daftar (ip_u32, ts_unix) yang masih berada di window terakhir, urut per IP lalu waktu,
+    untuk mengisi ulang attempts di monitor.
+    """
+    ips, ts = load_failures(path)
+    if ips.size == 0:
+        print(f"[BACKFILL] {path}: tidak ada login gagal")
+        return []
+    order = np.lexsort((ts, ips))
+    ips, ts = ips[order], ts[order]
+    counts = windowed_counts(ips, ts, window_s)
+
+    # ips sudah terurut: puncak per IP dihitung sekali jalan per segmen, bukan scan ulang per IP
+    starts = np.flatnonzero(np.r_[True, ips[1:] != ips[:-1]])
+    peaks = np.maximum.reduceat(counts, starts)
+    print(f"[BACKFILL] {path}: {ips.size} login gagal dari {starts.size} IP")
+    flagged = peaks >= threshold
+    for ip, peak in zip(ips[starts][flagged], peaks[flagged]):
+        print(f"[BACKFILL] ip={ip_to_str(ip)} puncak={peak} percobaan/{window_s}s")
+
+    cutoff = (time.time() if now is None else now) - window_s
+    recent = ts >= cutoff
+    return [(int(ip), int(t)) for ip, t in zip(ips[recent], ts[recent])]
@@ -0,0 +1,36 @@
+"""
+config.py
+Konfigurasi monitor.py, dibaca dari environment (atau file .env jika python-dotenv terpasang).
+"""
+
+import os
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+# ---------------- CONFIG ---------------- #
+LOG_PATH = os.getenv("LOG_PATH", "/var/log/auth.log")
+LOG_PATH_SET = "LOG_PATH" in os.environ
+# auto: journald bila LOG_PATH tidak diset dan python-systemd tersedia | journal | file
+LOG_SOURCE = os.getenv("LOG_SOURCE", "auto").lower()
+WINDOW_MINUTES = int(os.getenv("WINDOW_MINUTES", "5"))
+THRESHOLD_ATTEMPTS = int(os.getenv("THRESHOLD_ATTEMPTS", "5"))
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_ENDPOINT = os.getenv(
+    "GEMINI_ENDPOINT",
+    "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent",
+)
+FONNTE_TOKEN = os.getenv("FONNTE_TOKEN")
+FONNTE_DEVICE_NO = os.getenv("FONNTE_DEVICE_NO")
+FONNTE_API = os.getenv("FONNTE_API", "https://api.fonnte.com/send")
+NOTIFY_ON_SUCCESS = os.getenv("NOTIFY_ON_SUCCESS", "true").lower() in ("1", "true", "yes")
+GEMINI_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "4"))
+MAX_PENDING_ALERTS = int(os.getenv("MAX_PENDING_ALERTS", "32"))
+MAX_TRACKED_IPS = int(os.getenv("MAX_TRACKED_IPS", "10000"))
+AI_BATCH_WINDOW = float(os.getenv("AI_BATCH_WINDOW", "0.25"))
+AI_BATCH_SIZE = int(os.getenv("AI_BATCH_SIZE", "8"))
+AI_CACHE_PATH = os.getenv("AI_CACHE_PATH")  # file shelve; kosong = cache hanya di memori
+# ----------------------------------------- #
@@ -0,0 +1,24 @@
+"""
+patterns.py
+Pola regex log sshd yang dipakai bersama monitor.py dan backfill.py.
+"""
+
+try:
+    import re2 as re  # google-re2: DFA waktu-linear, tanpa backtracking
+
+    def compile_ascii(pattern):
+        # RE2 sudah memperlakukan \d dan \S sebagai ASCII; argumen kedua re2.compile adalah Options
+        return re.compile(pattern)
+except ImportError:
+    import re
+
+    def compile_ascii(pattern):
+        return re.compile(pattern, re.ASCII)
+
+# Oktet 0-255 dan username dibatasi panjangnya agar baris buatan penyerang tidak memicu backtracking
+OCTET = r'(?:25[0-5]|2[0-4]\d|[01]?\d\d?)'
+IPV4 = rf'{OCTET}(?:\.{OCTET}){{3}}\b'
+USERNAME = r'[^ \t]{1,64}'
+
+FAILED = rf'Failed password for (?:invalid user )?(?P<fuser>{USERNAME}) from (?P<fip>{IPV4})'
+ACCEPTED = rf'Accepted (?:password|publickey) for (?P<auser>{USERNAME}) from (?P<aip>{IPV4})'